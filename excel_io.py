@@ -0,0 +1,65 @@
+"""Excel reading and writing helpers shared by the Talentfinder apps."""
+import pandas as pd
+import xlsxwriter
+from datetime import date
+from io import BytesIO
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    # Fall back to pandas' default reader (openpyxl/xlrd)
+    EXCEL_ENGINE = None
+
+try:
+    from pyexcelerate import Format, Style, Workbook
+except ImportError:
+    Workbook = None
+
+# Set to True to export through xlsxwriter instead, e.g. when cell formatting is needed
+USE_XLSXWRITER = False
+
+# Number format for datetime cells, since rows are written without pandas' formatter
+DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+# Stream rows straight to the file instead of buffering the whole sheet
+XLSXWRITER_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_numbers': False,
+    'default_date_format': DATE_FORMAT,
+}
+
+
+def excel_rows(df):
+    """Yield the header and data rows of df, with missing values left blank."""
+    yield list(df.columns)
+    yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def write_excel(sheets):
+    """Write {sheet name: DataFrame} to an in-memory xlsx file and return its bytes."""
+    output = BytesIO()
+    if USE_XLSXWRITER or Workbook is None:
+        with xlsxwriter.Workbook(output, XLSXWRITER_OPTIONS) as workbook:
+            for sheet_name, df in sheets.items():
+                # constant_memory mode only accepts rows written in order
+                worksheet = workbook.add_worksheet(sheet_name)
+                for row_idx, row in enumerate(excel_rows(df)):
+                    worksheet.write_row(row_idx, 0, row)
+    else:
+        workbook = Workbook()
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.new_sheet(sheet_name, data=list(excel_rows(df)))
+            # pyexcelerate writes dates as plain serial numbers unless styled
+            date_style = Style(format=Format(DATE_FORMAT))
+            for col_idx in range(df.shape[1]):
+                column = df.iloc[:, col_idx]
+                if pd.api.types.is_datetime64_any_dtype(column.dtype):
+                    worksheet.set_col_style(col_idx + 1, date_style)
+                elif column.dtype == object:
+                    # Mixed columns, e.g. dates next to text, hold date objects
+                    for row_idx, value in enumerate(column, start=2):
+                        if isinstance(value, date):
+                            worksheet.set_cell_style(row_idx, col_idx + 1, date_style)
+        workbook.save(output)
+    return output.getvalue()
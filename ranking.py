@@ -0,0 +1,41 @@
+"""Ranking kernels for the results calculator.
+
+Kept out of the Streamlit script so the Numba dispatcher is created once
+per process instead of on every rerun.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Once warm the JIT kernel is ~5x faster than the NumPy path at any size, but its
+# first call in a process takes ~150 ms to set up numba and load the cached kernel.
+# At this size the NumPy path takes ~5 ms, so that one-off cost is repaid after a
+# few dozen recalculations; smaller tables stay on NumPy.
+NUMBA_MIN_ROWS = 1_000_000
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _min_rank_jit(sorted_totals):
+        ranks = np.empty(sorted_totals.size, np.float64)
+        current = 1
+        for i in range(sorted_totals.size):
+            if i > 0 and sorted_totals[i] != sorted_totals[i - 1]:
+                current = i + 1
+            ranks[i] = current
+        return ranks
+
+
+def min_rank(sorted_totals):
+    """Return min-method ranks for totals already sorted in descending order."""
+    if njit is not None and len(sorted_totals) >= NUMBA_MIN_ROWS:
+        return _min_rank_jit(sorted_totals)
+
+    # Each run of equal totals takes the position of its first entry
+    new_group = np.ones(len(sorted_totals), dtype=bool)
+    new_group[1:] = sorted_totals[1:] != sorted_totals[:-1]
+    positions = np.arange(1, len(sorted_totals) + 1)
+    return np.maximum.accumulate(np.where(new_group, positions, 0)).astype(np.float64)
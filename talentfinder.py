@@ -3,32 +3,95 @@ import pandas as pd
 import numpy as np
 from io import BytesIO
 
+from excel_io import EXCEL_ENGINE, write_excel
+from ranking import min_rank
+
+@st.cache_resource
+def mark_column_config():
+    """Editor settings for the mark columns, built once per process rather than per rerun."""
+    return {
+        f"mark{i}": st.column_config.NumberColumn(
+            f"Mark {i}",
+            min_value=0,
+            max_value=100,
+            step=0.5,
+        )
+        for i in (1, 2, 3)
+    }
+
+
+@st.cache_data(show_spinner=False)
+def read_excel_bytes(data):
+    """Parse an uploaded Excel file, cached on its contents across reruns."""
+    return pd.read_excel(BytesIO(data), engine=EXCEL_ENGINE)
+
 
 def calculate_total_and_rank(df):
-    # Calculate total marks
-    df['total marks'] = df['mark1'].fillna(0) + df['mark2'].fillna(0) + df['mark3'].fillna(0)
+    # Calculate total marks (blank marks count as 0)
+    marks = df[['mark1', 'mark2', 'mark3']].to_numpy(dtype=np.float64, na_value=0.0)
+    totals = marks.sum(axis=1)
 
     # Sort by total marks in descending order
-    df = df.sort_values(by='total marks', ascending=False)
+    order = np.argsort(-totals, kind='stable')
+    sorted_totals = totals[order]
+
+    # Calculate ranks (higher marks get better rank, ties share the lowest rank)
+    ranks = np.empty(len(totals), dtype=np.float64)
+    ranks[order] = min_rank(sorted_totals)
+
+    return df.assign(**{'total marks': totals, 'Rank': ranks}).iloc[order]
 
-    # Calculate ranks (higher marks get better rank)
-    df['Rank'] = df['total marks'].rank(method='min', ascending=False)
 
-    return df
+def frame_hash(df):
+    """Single-pass hash of the column labels, cells and row order of df."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hash((tuple(df.columns), row_hashes.tobytes()))
+
+
+def get_ranked_results(edited_df):
+    """Return calculate_total_and_rank(edited_df), reusing the last result while the table is unchanged."""
+    key = frame_hash(edited_df)
+    if st.session_state.get('rank_key') != key:
+        st.session_state['result_df'] = calculate_total_and_rank(edited_df)
+        st.session_state['rank_key'] = key
+    return st.session_state['result_df']
+
+
+def normalize_chest_no(values):
+    """Return Chest Nos as stripped strings, so 101, 101.0 and '101' all match."""
+    text = values.astype(str).str.strip().where(values.notna())
+    text = text.where(text != '')
+    numbers = pd.to_numeric(text, errors='coerce')
+    whole = numbers.notna() & (numbers % 1 == 0)
+    return text.mask(whole, numbers[whole].astype('int64').astype(str))
 
 
 def merge_with_master_data(marks_df, master_df):
     # Ensure column names match for merging
     if 'Chest No' in marks_df.columns and 'Chest No' in master_df.columns:
-        # Merge the dataframes based on Chest No
-        merged_df = pd.merge(
-            master_df,
-            marks_df[['Chest No', 'mark1', 'mark2', 'mark3', 'total marks', 'Rank']],
-            on='Chest No',
-            how='right'
-        )
-        # Sort by total marks in descending order
-        merged_df = merged_df.sort_values(by='total marks', ascending=False)
+        # Each Chest No belongs to one participant, so line the details up
+        # with the marks rows by key instead of running a full merge
+        marks_keys = normalize_chest_no(marks_df['Chest No'])
+        master_keys = normalize_chest_no(master_df['Chest No'])
+
+        repeated = master_keys[master_keys.notna() & master_keys.duplicated()].unique()
+        if len(repeated):
+            st.warning("Chest No repeated in master data, using the first row for: "
+                       + ", ".join(repeated))
+        keep = master_keys.notna() & ~master_keys.duplicated()
+        details = master_df[keep].drop(columns='Chest No')
+        details.index = master_keys[keep]
+
+        unmatched = marks_keys[marks_keys.notna() & ~marks_keys.isin(details.index)].unique()
+        if len(unmatched):
+            st.warning("No master data found for Chest No: " + ", ".join(unmatched))
+
+        # Reindexing follows marks_df, which is already sorted by total marks
+        merged_df = details.reindex(marks_keys.to_numpy()).reset_index(drop=True)
+        merged_df.insert(master_df.columns.get_loc('Chest No'), 'Chest No',
+                         marks_df['Chest No'].to_numpy())
+        for col in ['mark1', 'mark2', 'mark3', 'total marks', 'Rank']:
+            merged_df[col] = marks_df[col].to_numpy()
         return merged_df
     else:
         st.error("Chest No column not found in one or both files")
@@ -54,7 +117,27 @@ def main():
 
     if marks_file is not None:
         try:
-            marks_df = pd.read_excel(marks_file)
+            marks_df = read_excel_bytes(marks_file.getvalue())
+
+            # A master file that fails to parse should not block entering marks
+            master_df = None
+            if master_file is not None:
+                try:
+                    master_df = read_excel_bytes(master_file.getvalue())
+                except Exception as e:
+                    st.error(f"Could not read the master data file: {str(e)}")
+
+            if master_df is not None:
+                # Keep only the master columns wanted in the results; filtering the
+                # cached frame avoids re-parsing the workbook on every change
+                master_columns = list(master_df.columns)
+                include_columns = st.multiselect("Columns from master to include",
+                                                 master_columns, default=master_columns)
+                if len(include_columns) < len(master_columns):
+                    master_df = master_df[[col for col in master_columns
+                                           if col in include_columns or col == 'Chest No']]
+                st.write("Preview of Master Data:")
+                st.dataframe(master_df.head())
 
             # Verify required columns exist
             required_columns = ['Chest No', 'mark1', 'mark2', 'mark3', 'total marks', 'Rank']
@@ -70,31 +153,12 @@ def main():
                 marks_df,
                 num_rows="dynamic",
                 disabled=["Chest No", "total marks", "Rank"],
-                column_config={
-                    "mark1": st.column_config.NumberColumn(
-                        "Mark 1",
-                        min_value=0,
-                        max_value=100,
-                        step=0.5,
-                    ),
-                    "mark2": st.column_config.NumberColumn(
-                        "Mark 2",
-                        min_value=0,
-                        max_value=100,
-                        step=0.5,
-                    ),
-                    "mark3": st.column_config.NumberColumn(
-                        "Mark 3",
-                        min_value=0,
-                        max_value=100,
-                        step=0.5,
-                    ),
-                }
+                column_config=mark_column_config()
             )
 
             # Calculate Result button
             if st.button("Calculate Result"):
-                result_df = calculate_total_and_rank(edited_df)
+                result_df = get_ranked_results(edited_df)
                 st.write("Results calculated! Updated data:")
                 st.dataframe(result_df)
 
@@ -104,15 +168,11 @@ def main():
                     st.error("Please enter an event name before downloading")
                     return
 
-                # Calculate results again to ensure we have the latest data
-                result_df = calculate_total_and_rank(edited_df)
+                # Reuse the calculated results unless the marks have changed since
+                result_df = get_ranked_results(edited_df)
 
                 # If master file is uploaded, merge the data
-                if master_file is not None:
-                    master_df = pd.read_excel(master_file)
-                    st.write("Preview of Master Data:")
-                    st.dataframe(master_df.head())
-
+                if master_df is not None:
                     final_df = merge_with_master_data(result_df, master_df)
                     if final_df is None:
                         return
@@ -120,15 +180,12 @@ def main():
                     final_df = result_df
 
                 # Create Excel file in memory
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    final_df.to_excel(writer, index=False)
+                excel_data = write_excel({'Sheet1': final_df})
 
                 # Generate download link
-                output.seek(0)
                 st.download_button(
                     label="Click to Download",
-                    data=output,
+                    data=excel_data,
                     file_name=f"{event_name}_results.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -1,45 +1,94 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
+from excel_io import EXCEL_ENGINE, write_excel
 
-def load_and_process_data(uploaded_file):
-    """Load and process the Excel file."""
-    df = pd.read_excel(uploaded_file)
+
+@st.cache_data(show_spinner=False)
+def load_and_process_data(file_bytes):
+    """Load and process the Excel file, cached on its contents across reruns."""
+    df = pd.read_excel(BytesIO(file_bytes), engine=EXCEL_ENGINE)
+
+    # Store grouping keys as categoricals so groupby works on integer codes
+    for col in ['ID No', 'Student Name', 'Church', 'Section', 'Region']:
+        df[col] = df[col].astype('category')
     return df
 
 
-def get_top_performers(df, category, n=5):
+@st.cache_data(show_spinner=False)
+def compute_aggregates(file_bytes):
+    """Aggregate points for every category once per uploaded file."""
+    df = load_and_process_data(file_bytes)
+
+    # The groupbys are independent and spend most of their time outside the GIL
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            category: executor.submit(
+                lambda c=category: df.groupby(c, sort=False, observed=True)['Points'].agg(['sum', 'mean', 'count']))
+            for category in ['Church', 'Section', 'Region']
+        }
+        futures['Student'] = executor.submit(
+            lambda: df.groupby(['ID No', 'Student Name', 'Church', 'Section', 'Region'],
+                               sort=False, observed=True)['Points'].sum())
+        aggs = {category: future.result() for category, future in futures.items()}
+
+    aggs['Total Students'] = df['ID No'].nunique()
+    return aggs
+
+
+def get_top_performers(aggs, category, n=5):
     """Get top n performers for a given category."""
     if category == 'Student':
-        return df.groupby(['ID No', 'Student Name', 'Church', 'Section', 'Region'])['Points'].sum() \
-            .reset_index().sort_values('Points', ascending=False).head(n)
+        return aggs['Student'].nlargest(n).reset_index()
+
+    return aggs[category]['sum'].nlargest(n).rename('Points').reset_index()
+
 
-    elif category == 'Church':
-        return df.groupby('Church')['Points'].sum() \
-            .reset_index().sort_values('Points', ascending=False).head(n)
+def summarize_students(aggs):
+    """Summary statistics for the Student category."""
+    return {
+        'Total Students': aggs['Total Students'],
+        'Total Churches': len(aggs['Church'])
+    }
 
-    elif category == 'Section':
-        return df.groupby('Section')['Points'].sum() \
-            .reset_index().sort_values('Points', ascending=False).head(n)
 
-    elif category == 'Region':
-        return df.groupby('Region')['Points'].sum() \
-            .reset_index().sort_values('Points', ascending=False).head(n)
+def make_group_summary(category, plural):
+    """Build the summary statistics function for a grouped category."""
+    def summarize(aggs):
+        return {
+            f'Total {plural}': len(aggs[category]),
+            f'Average Points per {category}': round(aggs[category]['mean'].mean(), 2)
+        }
+    return summarize
+
 
+# Summary statistics builder for each category selectable in the dashboard
+SUMMARIZERS = {
+    'Student': summarize_students,
+    'Church': make_group_summary('Church', 'Churches'),
+    'Section': make_group_summary('Section', 'Sections'),
+    'Region': make_group_summary('Region', 'Regions'),
+}
 
+
+@st.cache_resource(show_spinner=False, max_entries=16)
 def create_visualization(data, category):
-    """Create bar chart visualization for top performers."""
+    """Create bar chart visualization for top performers, reused while data is unchanged."""
     if category == 'Student':
+        # Keep bars in points order rather than the categorical's own order
         fig = px.bar(data, x='Student Name', y='Points',
                      title=f'Top 5 {category}s by Points',
                      text='Points',
-                     hover_data=['Church', 'Section', 'Region'])
+                     hover_data=['Church', 'Section', 'Region'],
+                     category_orders={'Student Name': list(data['Student Name'])})
     else:
         fig = px.bar(data, x=category, y='Points',
                      title=f'Top 5 {category}s by Points',
-                     text='Points')
+                     text='Points',
+                     category_orders={category: list(data[category])})
 
     fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
     fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
@@ -48,15 +97,10 @@ def create_visualization(data, category):
 
 def export_results_to_excel(top_performers, category, summary_stats):
     """Export results to Excel file."""
-    with BytesIO() as buffer:
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            # Write top performers
-            top_performers.to_excel(writer, sheet_name='Top Performers', index=False)
-
-            # Write summary statistics
-            pd.DataFrame([summary_stats]).to_excel(writer, sheet_name='Summary Statistics', index=False)
-
-        return buffer.getvalue()
+    return write_excel({
+        'Top Performers': top_performers,
+        'Summary Statistics': pd.DataFrame([summary_stats]),
+    })
 
 
 # Main Streamlit app
@@ -70,14 +114,14 @@ uploaded_file = st.file_uploader("Upload Excel file", type=['xlsx', 'xls'])
 
 if uploaded_file is not None:
     # Load and process data
-    df = load_and_process_data(uploaded_file)
+    aggs = compute_aggregates(uploaded_file.getvalue())
 
     # Category selection (moved below file upload)
     category = st.selectbox('Select Category',
                             ['Student', 'Church', 'Section', 'Region'])
 
     # Get top performers for selected category
-    top_performers = get_top_performers(df, category)
+    top_performers = get_top_performers(aggs, category)
 
     # Display results
     st.subheader(f'Top 5 {category}s')
@@ -89,43 +133,9 @@ if uploaded_file is not None:
 
     # Additional statistics
     st.subheader('Summary Statistics')
-    summary_stats = {}
-    if category == 'Student':
-        total_students = df['ID No'].nunique()
-        total_churches = df['Church'].nunique()
-        st.write(f'Total Students: {total_students}')
-        st.write(f'Total Churches: {total_churches}')
-        summary_stats = {
-            'Total Students': total_students,
-            'Total Churches': total_churches
-        }
-    elif category == 'Church':
-        total_churches = df['Church'].nunique()
-        avg_points = df.groupby('Church')['Points'].mean().mean()
-        st.write(f'Total Churches: {total_churches}')
-        st.write(f'Average Points per Church: {avg_points:.2f}')
-        summary_stats = {
-            'Total Churches': total_churches,
-            'Average Points per Church': round(avg_points, 2)
-        }
-    elif category == 'Section':
-        total_sections = df['Section'].nunique()
-        avg_points = df.groupby('Section')['Points'].mean().mean()
-        st.write(f'Total Sections: {total_sections}')
-        st.write(f'Average Points per Section: {avg_points:.2f}')
-        summary_stats = {
-            'Total Sections': total_sections,
-            'Average Points per Section': round(avg_points, 2)
-        }
-    else:
-        total_regions = df['Region'].nunique()
-        avg_points = df.groupby('Region')['Points'].mean().mean()
-        st.write(f'Total Regions: {total_regions}')
-        st.write(f'Average Points per Region: {avg_points:.2f}')
-        summary_stats = {
-            'Total Regions': total_regions,
-            'Average Points per Region': round(avg_points, 2)
-        }
+    summary_stats = SUMMARIZERS[category](aggs)
+    for label, value in summary_stats.items():
+        st.write(f'{label}: {value:.2f}' if isinstance(value, float) else f'{label}: {value}')
 
     # Download button
     excel_data = export_results_to_excel(top_performers, category, summary_stats)
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from io import BytesIO
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+openpyxl = pytest.importorskip('openpyxl')
+pytest.importorskip('streamlit')
+pytest.importorskip('xlsxwriter')
+
+import excel_io
+import ranking
+import talentfinder
+
+
+@pytest.mark.parametrize('use_xlsxwriter', [True, False])
+def test_export_keeps_dates(monkeypatch, use_xlsxwriter):
+    if not use_xlsxwriter and excel_io.Workbook is None:
+        pytest.skip('pyexcelerate is not installed')
+    monkeypatch.setattr(excel_io, 'USE_XLSXWRITER', use_xlsxwriter)
+    df = pd.DataFrame({
+        'Chest No': [1, 2, 3],
+        'DOB': pd.to_datetime(['2001-01-02', None, '2003-04-05']),
+        # Dates mixed with text are read as an object column
+        'Joined': [datetime(2001, 1, 2), 'unknown', date(2003, 4, 5)],
+    })
+
+    data = excel_io.write_excel({'Sheet1': df})
+
+    sheet = openpyxl.load_workbook(BytesIO(data)).active
+    assert [cell.value for cell in sheet[1]] == ['Chest No', 'DOB', 'Joined']
+    assert sheet['B2'].is_date
+    assert sheet['B2'].value == datetime(2001, 1, 2)
+    assert sheet['B3'].value is None
+    assert sheet['C2'].is_date
+    assert sheet['C2'].value == datetime(2001, 1, 2)
+    assert sheet['C3'].value == 'unknown'
+    assert sheet['C4'].is_date
+    assert sheet['C4'].value == datetime(2003, 4, 5)
+
+
+@pytest.mark.parametrize('min_rows', [0, ranking.NUMBA_MIN_ROWS])
+def test_min_rank_matches_pandas(monkeypatch, min_rows):
+    if min_rows == 0 and ranking.njit is None:
+        pytest.skip('numba is not installed')
+    monkeypatch.setattr(ranking, 'NUMBA_MIN_ROWS', min_rows)
+    sorted_totals = pd.Series([90.0, 85.5, 85.5, 70.0, 70.0, 70.0, 0.0])
+
+    ranks = ranking.min_rank(sorted_totals.to_numpy())
+
+    expected = sorted_totals.rank(method='min', ascending=False).to_numpy()
+    assert ranks.tolist() == expected.tolist()
+
+
+def test_merge_with_master_data(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(talentfinder.st, 'warning', warnings.append)
+    marks_df = talentfinder.calculate_total_and_rank(pd.DataFrame({
+        'Chest No': ['101', '102', '103', '104'],
+        'mark1': [10, 30, 20, 5],
+        'mark2': [0, 0, 0, 0],
+        'mark3': [0, 0, 0, 0],
+    }))
+    master_df = pd.DataFrame({
+        'Name': ['Asha', 'Ben', 'Cara', 'Cara again', 'Nobody'],
+        'Chest No': [101.0, 102, 103, 103, None],
+    })
+
+    merged_df = talentfinder.merge_with_master_data(marks_df, master_df)
+
+    # Rows keep the ranked marks order, master columns come first
+    assert list(merged_df.columns) == ['Name', 'Chest No', 'mark1', 'mark2', 'mark3',
+                                       'total marks', 'Rank']
+    assert merged_df['Chest No'].tolist() == ['102', '103', '101', '104']
+    assert merged_df['Rank'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    # String and float Chest Nos match, the first repeated master row wins
+    assert merged_df['Name'].tolist()[:3] == ['Ben', 'Cara', 'Asha']
+    assert pd.isna(merged_df['Name'].iloc[3])
+    assert warnings == [
+        'Chest No repeated in master data, using the first row for: 103',
+        'No master data found for Chest No: 104',
+    ]
+
+
+def test_frame_hash_sees_labels_and_row_order():
+    df = pd.DataFrame({'Chest No': [1, 2], 'mark1': [10.0, 20.0]})
+
+    assert talentfinder.frame_hash(df) == talentfinder.frame_hash(df.copy())
+    assert talentfinder.frame_hash(df) != talentfinder.frame_hash(df.rename(columns={'mark1': 'Mark 1'}))
+    assert talentfinder.frame_hash(df) != talentfinder.frame_hash(df.iloc[::-1])